@@ -1,16 +1,20 @@
 #!/usr/bin/env python3
 
 import argparse
-import boto3
+import functools
+from functools import cached_property
+import itertools
 import time
+import random
 import logging
 import json
-import inquirer
-from botocore.stub import Stubber
-from botocore.exceptions import ClientError
-from datetime import datetime
-import pytz
+import re
+from datetime import datetime, timezone
 import sys
+import threading
+from dataclasses import dataclass, field, fields
+from types import MappingProxyType
+from typing import Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -18,7 +22,7 @@ logger = logging.getLogger(__name__)
 
 # Common instance types by use case
 INSTANCE_TYPE_CHOICES = {
-    'general_purpose': [
+    'general_purpose': (
         # T instances (burstable)
         't2.nano', 't2.micro', 't2.small', 't2.medium', 't2.large', 't2.xlarge', 't2.2xlarge',
         't3.nano', 't3.micro', 't3.small', 't3.medium', 't3.large', 't3.xlarge', 't3.2xlarge',
@@ -31,8 +35,8 @@ INSTANCE_TYPE_CHOICES = {
         'm6g.medium', 'm6g.large', 'm6g.xlarge', 'm6g.2xlarge', 'm6g.4xlarge', 'm6g.8xlarge', 'm6g.12xlarge', 'm6g.16xlarge',
         'm6i.large', 'm6i.xlarge', 'm6i.2xlarge', 'm6i.4xlarge', 'm6i.8xlarge', 'm6i.12xlarge', 'm6i.16xlarge', 'm6i.24xlarge', 'm6i.32xlarge',
         'm7g.medium', 'm7g.large', 'm7g.xlarge', 'm7g.2xlarge', 'm7g.4xlarge', 'm7g.8xlarge', 'm7g.12xlarge', 'm7g.16xlarge'
-    ],
-    'compute_optimized': [
+    ),
+    'compute_optimized': (
         # C instances
         'c4.large', 'c4.xlarge', 'c4.2xlarge', 'c4.4xlarge', 'c4.8xlarge',
         'c5.large', 'c5.xlarge', 'c5.2xlarge', 'c5.4xlarge', 'c5.9xlarge', 'c5.12xlarge', 'c5.18xlarge', 'c5.24xlarge',
@@ -41,8 +45,8 @@ INSTANCE_TYPE_CHOICES = {
         'c6g.medium', 'c6g.large', 'c6g.xlarge', 'c6g.2xlarge', 'c6g.4xlarge', 'c6g.8xlarge', 'c6g.12xlarge', 'c6g.16xlarge',
         'c6i.large', 'c6i.xlarge', 'c6i.2xlarge', 'c6i.4xlarge', 'c6i.8xlarge', 'c6i.12xlarge', 'c6i.16xlarge', 'c6i.24xlarge', 'c6i.32xlarge',
         'c7g.medium', 'c7g.large', 'c7g.xlarge', 'c7g.2xlarge', 'c7g.4xlarge', 'c7g.8xlarge', 'c7g.12xlarge', 'c7g.16xlarge'
-    ],
-    'memory_optimized': [
+    ),
+    'memory_optimized': (
         # R instances
         'r4.large', 'r4.xlarge', 'r4.2xlarge', 'r4.4xlarge', 'r4.8xlarge', 'r4.16xlarge',
         'r5.large', 'r5.xlarge', 'r5.2xlarge', 'r5.4xlarge', 'r5.8xlarge', 'r5.12xlarge', 'r5.16xlarge', 'r5.24xlarge',
@@ -56,8 +60,8 @@ INSTANCE_TYPE_CHOICES = {
         'x2gd.medium', 'x2gd.large', 'x2gd.xlarge', 'x2gd.2xlarge', 'x2gd.4xlarge', 'x2gd.8xlarge', 'x2gd.12xlarge', 'x2gd.16xlarge',
         # High Memory instances
         'u-3tb1.56xlarge', 'u-6tb1.56xlarge', 'u-6tb1.112xlarge', 'u-9tb1.112xlarge', 'u-12tb1.112xlarge'
-    ],
-    'storage_optimized': [
+    ),
+    'storage_optimized': (
         # I instances (NVMe SSD)
         'i3.large', 'i3.xlarge', 'i3.2xlarge', 'i3.4xlarge', 'i3.8xlarge', 'i3.16xlarge', 'i3.metal',
         'i3en.large', 'i3en.xlarge', 'i3en.2xlarge', 'i3en.3xlarge', 'i3en.6xlarge', 'i3en.12xlarge', 'i3en.24xlarge', 'i3en.metal',
@@ -65,8 +69,8 @@ INSTANCE_TYPE_CHOICES = {
         'd2.xlarge', 'd2.2xlarge', 'd2.4xlarge', 'd2.8xlarge',
         'd3.xlarge', 'd3.2xlarge', 'd3.4xlarge', 'd3.8xlarge',
         'd3en.xlarge', 'd3en.2xlarge', 'd3en.4xlarge', 'd3en.6xlarge', 'd3en.8xlarge', 'd3en.12xlarge'
-    ],
-    'accelerated_computing': [
+    ),
+    'accelerated_computing': (
         # P instances (GPU)
         'p2.xlarge', 'p2.8xlarge', 'p2.16xlarge',
         'p3.2xlarge', 'p3.8xlarge', 'p3.16xlarge',
@@ -85,17 +89,31 @@ INSTANCE_TYPE_CHOICES = {
         # Trn instances (Trainium)
         'trn1.2xlarge', 'trn1.32xlarge',
         'trn1n.32xlarge'
-    ],
-    'hpc_optimized': [
+    ),
+    'hpc_optimized': (
         # Hpc instances
         'hpc6a.48xlarge',
         'hpc6id.32xlarge',
         'hpc7g.4xlarge', 'hpc7g.8xlarge', 'hpc7g.16xlarge'
-    ]
+    )
 }
 
+# Intern the type names so lookups against them compare by identity first,
+# and expose the table read-only
+INSTANCE_TYPE_CHOICES = MappingProxyType({category: tuple(map(sys.intern, types))
+                                          for category, types in INSTANCE_TYPE_CHOICES.items()})
+
+# Per-category sets for membership checks - the tuples above keep the display order
+INSTANCE_TYPE_SETS = {category: frozenset(types) for category, types in INSTANCE_TYPE_CHOICES.items()}
+
+# Reverse index: instance type -> its category
+_INSTANCE_TYPE_TO_CATEGORY = {t: category for category, types in INSTANCE_TYPE_CHOICES.items() for t in types}
+
+# Flat list of every instance type, used for argparse choices
+ALL_INSTANCE_TYPES = tuple(itertools.chain.from_iterable(INSTANCE_TYPE_CHOICES.values()))
+
 # Platform choices
-PLATFORM_CHOICES = [
+PLATFORM_CHOICES = tuple(map(sys.intern, (
     'Linux/UNIX',
     'Red Hat Enterprise Linux',
     'SUSE Linux',
@@ -104,177 +122,361 @@ PLATFORM_CHOICES = [
     'Windows with SQL Server Enterprise',
     'Windows with SQL Server Standard',
     'Windows with SQL Server Web'
-]
+)))
 
 # Region and AZ choices (common ones)
-REGION_CHOICES = [
+REGION_CHOICES = tuple(map(sys.intern, (
     'us-east-1', 'us-east-2', 'us-west-1', 'us-west-2',
     'eu-west-1', 'eu-central-1', 'ap-southeast-1', 'ap-northeast-1'
-]
+)))
+
+# Log level names accepted by --log-level
+LOG_LEVELS = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR
+}
+
+# AWS error codes that are worth retrying - anything else fails immediately.
+# Throttling and 5xx errors are retried inside botocore (see _client_config), not here.
+RETRYABLE_ERROR_CODES = frozenset({'InsufficientCapacityError'})
+
+# Instance IDs are 'i-' followed by 17 hex digits
+_INSTANCE_ID_RE = re.compile(r'i-[0-9a-f]{17}')
+
+# Cheap prefilter for validate_date - anything without a YYYY-MM-DD prefix can't parse
+_ISO8601_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# datetime.fromisoformat only accepts a trailing 'Z' from Python 3.11
+_NEED_Z_FIXUP = sys.version_info < (3, 11)
 
-# Retry configurations
+# Most instance IDs sent in one describe_instances 'instance-id' filter
+DESCRIBE_INSTANCES_BATCH_SIZE = 200
+
+# Reservations created at once by CapacityReservationManager.create_reservations_bulk
+BULK_MAX_WORKERS = 8
+
+# Retry configurations - backoff starts at retry_delay_seconds, doubles on each
+# attempt and is capped at max_delay_seconds
 RETRY_CONFIG = {
     'QUICK_RETRY': {
         'max_retries': 3,
         'retry_delay_seconds': 1,
+        'max_delay_seconds': 4,
         'description': 'Quick retries with short delays'
     },
     'SLOW_RETRY': {
         'max_retries': 2,
         'retry_delay_seconds': 2,
+        'max_delay_seconds': 8,
         'description': 'Fewer retries with longer delays'
     },
     'EXTENSIVE_RETRY': {
         'max_retries': 20,
         'retry_delay_seconds': 3,
+        'max_delay_seconds': 3,
         'description': 'Many retries with longer delays'
     }
 }
 
+# Retry configuration names accepted by --retry-config
+_RETRY_CONFIG_KEYS = tuple(RETRY_CONFIG)
+
+def _client_config(max_attempts):
+    """Get the botocore client config used for EC2 clients.
+
+    Throttling and transient (5xx) errors are retried inside botocore with its
+    adaptive rate limiting, up to max_attempts calls in total; capacity errors
+    are not retryable there and are handled by create_reservation.
+    """
+    from botocore.config import Config
+
+    return Config(retries={'total_max_attempts': max_attempts, 'mode': 'adaptive'})
+
+@functools.lru_cache(maxsize=None)
+def _get_session(profile=None):
+    """Get a cached boto3 Session for an AWS profile (None for the default credential chain)"""
+    import boto3
+
+    return boto3.Session(profile_name=profile)
+
+@functools.lru_cache(maxsize=16)
+def _get_ec2_client(region, profile=None, max_attempts=3):
+    """Get a cached EC2 client for a region/profile pair.
+
+    Client construction loads the service model and builds endpoints, so it is
+    done once per process. Simulation clients are not cached since each Stubber
+    hooks into its own client.
+    """
+    return _get_session(profile).client('ec2', region_name=region,
+                                        config=_client_config(max_attempts))
+
+@functools.lru_cache(maxsize=None)
+def _get_account_id(profile):
+    """Get the AWS account ID for a profile - one STS call per profile per process"""
+    return _get_session(profile).client('sts').get_caller_identity()['Account']
+
+@functools.lru_cache(maxsize=1)
+def get_aws_profiles():
+    """Get the names of the AWS profiles configured on this machine.
+
+    Reads the shared config/credentials files directly instead of building a
+    boto3 Session just for its available_profiles. The result is sorted once
+    for the profile prompt, with 'default' first.
+    """
+    import configparser
+    import os
+
+    profiles = {}  # Ordered set of profile names
+    config_files = (
+        (os.environ.get('AWS_CONFIG_FILE', '~/.aws/config'), True),
+        (os.environ.get('AWS_SHARED_CREDENTIALS_FILE', '~/.aws/credentials'), False)
+    )
+    for path, is_config_file in config_files:
+        parser = configparser.RawConfigParser()
+        try:
+            parser.read(os.path.expanduser(path))
+        except configparser.Error as e:
+            # Let botocore deal with anything configparser can't read
+            logger.warning("Could not parse %s: %s", path, e)
+            return _sorted_profiles(_get_session().available_profiles)
+
+        for section in parser.sections():
+            # The config file uses [profile name] (except [default]), credentials uses [name]
+            if is_config_file and section != 'default':
+                if not section.startswith('profile '):
+                    continue
+                section = section[len('profile '):].strip()
+            profiles[section] = None
+
+    return _sorted_profiles(profiles)
+
+def _sorted_profiles(profiles):
+    return tuple(sorted(profiles, key=lambda name: (name != 'default', name)))
+
+def setup_aws_session(profile):
+    """Setup the boto3 session for an AWS profile, returns None if the profile can't be loaded"""
+    from botocore.exceptions import BotoCoreError
+
+    try:
+        return _get_session(profile)
+    except BotoCoreError as e:
+        logger.error("Error setting up AWS session for profile %s: %s", profile, e)
+        return None
+
+def _aws_tags(tags):
+    """Convert a {key: value} tag dict to the AWS [{'Key': ..., 'Value': ...}] list format"""
+    return [{'Key': k, 'Value': v} for k, v in tags.items()]
+
+def _choice_default(value, choices):
+    """Return value if it is one of choices, otherwise None (questionary rejects unknown defaults)"""
+    return value if value in choices else None
+
 def get_standard_questions(defaults=None):
     """Get standard questions for interactive mode with optional defaults"""
     if defaults is None:
         defaults = {}
-        
+
+    default_category = _INSTANCE_TYPE_TO_CATEGORY.get(defaults.get('instance_type'), 'general_purpose')
+
     questions = [
         # Instance Type Selection (two-step process)
-        inquirer.List('instance_type_category',
-                     message="Select instance type category",
-                     choices=list(INSTANCE_TYPE_CHOICES.keys()),
-                     default=next((cat for cat, types in INSTANCE_TYPE_CHOICES.items() 
-                                 if defaults.get('instance_type') in types), 'general_purpose')),
-        
-        # Dynamic instance type choices based on category
-        inquirer.List('instance_type',
-                     message="Choose instance type",
-                     choices=lambda answers: INSTANCE_TYPE_CHOICES[answers['instance_type_category']],
-                     default=defaults.get('instance_type')),
-        
+        {'type': 'select',
+         'name': 'instance_type_category',
+         'message': "Select instance type category",
+         'choices': list(INSTANCE_TYPE_CHOICES.keys()),
+         'default': default_category},
+    ]
+
+    # Instance type choices based on category - one question per category,
+    # only the one matching the selected category is asked
+    for category, types in INSTANCE_TYPE_CHOICES.items():
+        questions.append(
+            {'type': 'select',
+             'name': 'instance_type',
+             'message': "Choose instance type",
+             'choices': types,
+             'default': _choice_default(defaults.get('instance_type'), INSTANCE_TYPE_SETS[category]),
+             'when': lambda answers, category=category: answers['instance_type_category'] == category})
+
+    questions += [
         # Instance Count
-        inquirer.Text('instance_count',
-                     message="Enter number of instances to reserve",
-                     validate=lambda _, x: x.isdigit() and int(x) > 0,
-                     default=str(defaults.get('instance_count', '1'))),
-        
+        {'type': 'text',
+         'name': 'instance_count',
+         'message': "Enter number of instances to reserve",
+         'validate': validate_positive_int,
+         'default': str(defaults.get('instance_count', '1'))},
+
         # Platform Selection
-        inquirer.List('platform',
-                     message="Select platform",
-                     choices=PLATFORM_CHOICES,
-                     default=defaults.get('platform', 'Linux/UNIX')),
+        {'type': 'select',
+         'name': 'platform',
+         'message': "Select platform",
+         'choices': PLATFORM_CHOICES,
+         'default': _choice_default(defaults.get('platform', 'Linux/UNIX'), PLATFORM_CHOICES)},
 
         # Region and AZ Selection
-        inquirer.List('region',
-                     message="Select region",
-                     choices=REGION_CHOICES,
-                     default=defaults.get('region', 'us-west-2')),
-        
-        inquirer.Text('availability_zone',
-                     message="Enter availability zone (leave empty for auto-select)",
-                     default=defaults.get('availability_zone', '')),
+        {'type': 'select',
+         'name': 'region',
+         'message': "Select region",
+         'choices': REGION_CHOICES,
+         'default': _choice_default(defaults.get('region', 'us-west-2'), REGION_CHOICES)},
+
+        {'type': 'text',
+         'name': 'availability_zone',
+         'message': "Enter availability zone (leave empty for auto-select)",
+         'default': defaults.get('availability_zone', '')},
 
         # Instance Settings
-        inquirer.Confirm('ebs_optimized',
-                        message="Enable EBS optimization?",
-                        default=defaults.get('ebs_optimized', False)),
-        
-        inquirer.List('tenancy',
-                     message="Select tenancy",
-                     choices=['default', 'dedicated'],
-                     default=defaults.get('tenancy', 'default')),
+        {'type': 'confirm',
+         'name': 'ebs_optimized',
+         'message': "Enable EBS optimization?",
+         'default': defaults.get('ebs_optimized', False)},
+
+        {'type': 'select',
+         'name': 'tenancy',
+         'message': "Select tenancy",
+         'choices': ['default', 'dedicated'],
+         'default': _choice_default(defaults.get('tenancy', 'default'), ['default', 'dedicated'])},
 
         # Reservation Settings
-        inquirer.List('end_date_type',
-                     message="Select end date type",
-                     choices=['unlimited', 'limited'],
-                     default=defaults.get('end_date_type', 'unlimited')),
+        {'type': 'select',
+         'name': 'end_date_type',
+         'message': "Select end date type",
+         'choices': ['unlimited', 'limited'],
+         'default': defaults.get('end_date_type', 'unlimited')},
 
         # End date (only if limited)
-        inquirer.Text('end_date',
-                     message="Enter end date (ISO 8601 format, e.g., 2024-12-31T23:59:59)",
-                     ignore=lambda answers: answers['end_date_type'] == 'unlimited',
-                     validate=validate_date,
-                     default=defaults.get('end_date', '')),
+        {'type': 'text',
+         'name': 'end_date',
+         'message': "Enter end date (ISO 8601 format, e.g., 2024-12-31T23:59:59)",
+         'when': lambda answers: answers['end_date_type'] == 'limited',
+         'validate': validate_date,
+         'default': defaults.get('end_date', '')},
 
         # Tags
-        inquirer.Confirm('add_tags',
-                        message="Would you like to add tags?",
-                        default=bool(defaults.get('tags', False)))
+        {'type': 'confirm',
+         'name': 'add_tags',
+         'message': "Would you like to add tags?",
+         'default': bool(defaults.get('tags', False))}
     ]
     
     return questions
 
-def validate_date(_, value):
+# JSON decoder for --tags - orjson when installed, otherwise a stdlib decoder bound once
+try:
+    from orjson import loads as _decode_json
+except ImportError:
+    _decode_json = json.JSONDecoder().decode
+
+def parse_tags(value):
+    """Parse --tags JSON into a {key: value} dict"""
+    try:
+        tags = _decode_json(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"invalid JSON: {e}")
+    if not isinstance(tags, dict):
+        raise argparse.ArgumentTypeError('expected a JSON object, e.g. \'{"Key": "Value"}\'')
+    # JSON object keys are always strings, but values can be anything
+    for key, tag_value in tags.items():
+        if not isinstance(tag_value, str):
+            raise argparse.ArgumentTypeError(f"tag {key!r} must have a string value, got {tag_value!r}")
+    return tags
+
+def parse_tag_pairs(value):
+    """Parse 'key1=value1,key2=value2' into a tag dict, raises ValueError if malformed"""
+    tags = {}
+    for pair in value.split(','):
+        if not pair.strip():
+            continue
+        key, sep, tag_value = pair.partition('=')
+        if not sep or not key.strip():
+            raise ValueError(f"Invalid tag '{pair}', expected key=value")
+        tags[key.strip()] = tag_value.strip()
+    return tags
+
+def validate_tag_pairs(value):
+    """Validate a key=value,key=value tag list (blank is allowed)"""
+    try:
+        parse_tag_pairs(value)
+        return True
+    except ValueError as e:
+        return str(e)
+
+def validate_positive_int(value):
+    """Validate positive integer string (e.g. instance count)"""
+    return value.isdecimal() and value.lstrip('0') != ''
+
+def validate_date(value):
     """Validate date string format"""
-    if not value:
+    if not value or not _ISO8601_RE.match(value):
         return False
     try:
-        datetime.fromisoformat(value.replace('Z', '+00:00'))
+        datetime.fromisoformat(value.replace('Z', '+00:00') if _NEED_Z_FIXUP else value)
         return True
     except ValueError:
         return False
 
-def get_interactive_choices():
-    """Get choices through interactive prompts"""
-    
+def get_interactive_choices(defaults=None):
+    """Get choices through interactive prompts, with defaults for anything not prompted for"""
+    import questionary
+
     # First ask if user wants to base on existing instance
-    base_questions = [
-        inquirer.Confirm('use_existing',
-                        message="Would you like to base this reservation on an existing instance?",
-                        default=False)
-    ]
-    
-    base_answers = inquirer.prompt(base_questions)
-    if not base_answers:
+    use_existing = questionary.confirm(
+        "Would you like to base this reservation on an existing instance?",
+        default=False).ask()
+    if use_existing is None:
         sys.exit(1)
         
-    if base_answers['use_existing']:
-        instance_questions = [
-            inquirer.Text('instance_id',
-                         message="Enter the instance ID",
-                         validate=lambda _, x: x.startswith('i-') and len(x) == 19)
-        ]
-        
-        instance_answers = inquirer.prompt(instance_questions)
-        if not instance_answers:
+    if use_existing:
+        instance_id = questionary.text(
+            "Enter the instance ID",
+            validate=lambda x: _INSTANCE_ID_RE.fullmatch(x) is not None).ask()
+        if not instance_id:
             sys.exit(1)
             
         # Create temporary manager to get instance metadata
         temp_manager = CapacityReservationManager({'simulation_mode': False})
-        metadata = temp_manager.get_instance_metadata(instance_answers['instance_id'])
+        metadata = temp_manager.get_instance_metadata(instance_id)
         
         if not metadata:
             logger.error("Failed to get instance metadata")
             sys.exit(1)
             
         # Ask if user wants to modify any of the metadata values
-        modify_questions = [
-            inquirer.Confirm('modify_values',
-                           message="Would you like to modify any of these values?",
-                           default=False)
-        ]
+        modify_values = questionary.confirm(
+            "Would you like to modify any of these values?",
+            default=False).ask()
+        if modify_values is None:
+            sys.exit(1)
         
-        if inquirer.prompt(modify_questions)['modify_values']:
+        if modify_values:
             # Use regular questions but with metadata as defaults
-            questions = get_standard_questions(metadata)
+            answers = questionary.prompt(get_standard_questions(metadata))
+            if not answers:
+                sys.exit(1)
         else:
             # Just ask for count and end date type
             questions = [
-                inquirer.Text('instance_count',
-                            message="Number of instances",
-                            validate=lambda _, x: x.isdigit() and int(x) > 0),
-                            
-                inquirer.List('end_date_type',
-                            message="Select end date type",
-                            choices=['unlimited', 'limited'],
-                            default='unlimited'),
-                            
-                inquirer.Text('end_date',
-                            message="Enter end date (ISO 8601 format, e.g., 2024-12-31T23:59:59)",
-                            ignore=lambda answers: answers['end_date_type'] == 'unlimited',
-                            validate=validate_date)
+                {'type': 'text',
+                 'name': 'instance_count',
+                 'message': "Number of instances",
+                 'validate': validate_positive_int},
+
+                {'type': 'select',
+                 'name': 'end_date_type',
+                 'message': "Select end date type",
+                 'choices': ['unlimited', 'limited'],
+                 'default': 'unlimited'},
+
+                {'type': 'text',
+                 'name': 'end_date',
+                 'message': "Enter end date (ISO 8601 format, e.g., 2024-12-31T23:59:59)",
+                 'when': lambda answers: answers['end_date_type'] == 'limited',
+                 'validate': validate_date}
             ]
             
-            answers = inquirer.prompt(questions)
+            answers = questionary.prompt(questions)
             if not answers:
                 sys.exit(1)
                 
@@ -282,31 +484,33 @@ def get_interactive_choices():
             answers.update(metadata)
     else:
         # Use standard questions
-        questions = get_standard_questions()
-        answers = inquirer.prompt(questions)
+        answers = questionary.prompt(get_standard_questions())
         if not answers:
             sys.exit(1)
 
     # Handle tags
     if answers.pop('add_tags', False):
-        tags = {}
-        while True:
-            tag_questions = [
-                inquirer.Text('key',
-                            message="Enter tag key"),
-                inquirer.Text('value',
-                            message="Enter tag value"),
-                inquirer.Confirm('add_another',
-                               message="Add another tag?",
-                               default=False)
-            ]
-            tag_answers = inquirer.prompt(tag_questions)
-            if not tag_answers:
-                break
+        # Fast path: all tags on one line, blank falls back to one prompt per tag
+        tag_pairs = questionary.text(
+            "Enter tags as key=value,key=value (blank to enter them one at a time)",
+            validate=validate_tag_pairs).ask()
+        if tag_pairs is None:
+            sys.exit(1)
+        tags = parse_tag_pairs(tag_pairs)
+        if not tag_pairs:
+            while True:
+                tag_questions = [
+                    {'type': 'text', 'name': 'key', 'message': "Enter tag key"},
+                    {'type': 'text', 'name': 'value', 'message': "Enter tag value"},
+                    {'type': 'confirm', 'name': 'add_another', 'message': "Add another tag?", 'default': False}
+                ]
+                tag_answers = questionary.prompt(tag_questions)
+                if not tag_answers:
+                    break
             
-            tags[tag_answers['key']] = tag_answers['value']
-            if not tag_answers['add_another']:
-                break
+                tags[tag_answers['key']] = tag_answers['value']
+                if not tag_answers['add_another']:
+                    break
         answers['tags'] = tags
     else:
         answers['tags'] = {}
@@ -316,83 +520,100 @@ def get_interactive_choices():
         answers['availability_zone'] = f"{answers['region']}a"
 
     # Add default values for missing fields
-    defaults = {
-        'simulation_mode': True,
-        'log_level': 'INFO',
-        'retry_config': 'QUICK_RETRY',
-        'max_retries': 3,
-        'retry_delay': 1,
-        'max_wait_time': 3600,
-        'cleanup_on_failure': False
-    }
-    
-    for key, value in defaults.items():
-        if key not in answers:
-            answers[key] = value
+    if defaults is None:
+        defaults = {
+            'simulation_mode': True,
+            'log_level': 'INFO',
+            'retry_config': 'QUICK_RETRY',
+            'max_retries': 3,
+            'retry_delay': 1,
+            'max_wait_time': 3600,
+            'cleanup_on_failure': False
+        }
+
+    # Prompted answers win over defaults
+    answers = defaults | answers
 
     # Display summary of choices
-    logger.info("\nCapacity Reservation Parameters Summary:")
-    logger.info("-" * 40)
-    logger.info(f"Instance Type:      {answers['instance_type']}")
-    logger.info(f"Instance Count:     {answers['instance_count']}")
-    logger.info(f"Platform:           {answers['platform']}")
-    logger.info(f"Region:            {answers['region']}")
-    logger.info(f"Availability Zone: {answers['availability_zone']}")
-    logger.info(f"EBS Optimized:     {'Yes' if answers['ebs_optimized'] else 'No'}")
-    logger.info(f"Tenancy:           {answers['tenancy']}")
-    logger.info(f"End Date Type:     {answers['end_date_type']}")
-    if answers['end_date_type'] == 'limited':
-        logger.info(f"End Date:          {answers['end_date']}")
-    if answers['tags']:
-        logger.info("\nTags:")
-        for key, value in answers['tags'].items():
-            logger.info(f"  {key}: {value}")
-    logger.info("-" * 40)
+    if logger.isEnabledFor(logging.INFO):
+        summary = [
+            "\nCapacity Reservation Parameters Summary:",
+            "-" * 40,
+            f"Instance Type:      {answers['instance_type']}",
+            f"Instance Count:     {answers['instance_count']}",
+            f"Platform:           {answers['platform']}",
+            f"Region:            {answers['region']}",
+            f"Availability Zone: {answers['availability_zone']}",
+            f"EBS Optimized:     {'Yes' if answers['ebs_optimized'] else 'No'}",
+            f"Tenancy:           {answers['tenancy']}",
+            f"End Date Type:     {answers['end_date_type']}",
+        ]
+        if answers['end_date_type'] == 'limited':
+            summary.append(f"End Date:          {answers['end_date']}")
+        if answers['tags']:
+            summary.append("\nTags:")
+            summary.extend(f"  {key}: {value}" for key, value in answers['tags'].items())
+        summary.append("-" * 40)
+        logger.info("\n".join(summary))
     
     # Prompt for confirmation
-    confirm = inquirer.confirm("Proceed with these parameters?", default=True)
+    confirm = questionary.confirm("Proceed with these parameters?", default=True).ask()
     if not confirm:
         logger.info("Operation cancelled by user")
         sys.exit(0)
 
     return answers
 
+@dataclass(slots=True)
+class ReservationArgs:
+    """Normalized CapacityReservationManager arguments"""
+    instance_type: str = 't2.micro'
+    instance_count: int = 1
+    platform: str = 'Linux/UNIX'
+    region: str = 'us-east-1'
+    availability_zone: Optional[str] = None  # Defaults to the first AZ in the region
+    ebs_optimized: bool = False
+    tenancy: str = 'default'
+    end_date_type: str = 'unlimited'
+    end_date: Optional[str] = None
+    tags: dict = field(default_factory=dict)
+    simulation_mode: bool = True
+    log_level: str = 'INFO'
+    retry_config: str = 'QUICK_RETRY'
+    custom_max_retries: int = 0  # 0 to use the retry config value
+    custom_retry_delay: int = 0  # 0 to use the retry config value
+    max_wait_time: int = 3600
+    cleanup_on_failure: bool = False
+    existing_instance: Optional[str] = None
+    sim_failures_before_success: int = 2  # Simulated capacity errors before the mock succeeds
+
+    def __post_init__(self):
+        # Prompts return strings - convert once so a bad count fails here, not on the API call
+        self.instance_count = int(self.instance_count)
+        if not self.availability_zone:
+            self.availability_zone = f"{self.region}a"
+
+    @classmethod
+    def from_dict(cls, values):
+        """Build from CLI/prompt values, ignoring keys that aren't manager arguments"""
+        return cls(**{f.name: values[f.name] for f in fields(cls) if f.name in values})
+
 class CapacityReservationManager:
-    def __init__(self, args):
-        """Initialize with CLI arguments"""
-        # Convert dictionary to namespace if needed
-        if isinstance(args, dict):
-            from types import SimpleNamespace
-            args_dict = args.copy()  # Make a copy to avoid modifying the original
-            # Ensure all required attributes exist with defaults
-            defaults = {
-                'availability_zone': f"{args_dict.get('region', 'us-east-1')}a",
-                'end_date': None,
-                'simulation_mode': True,
-                'max_retries': 3,
-                'retry_delay': 1,
-                'max_wait_time': 3600,
-                'log_level': 'INFO',
-                'retry_config': 'QUICK_RETRY',
-                'tags': {},
-                'region': 'us-east-1'
-            }
-            # Update defaults with provided values
-            for key, value in defaults.items():
-                if key not in args_dict:
-                    args_dict[key] = value
-            self.args = SimpleNamespace(**args_dict)
-        else:
+    def __init__(self, args, profile=None):
+        """Initialize with CLI arguments (dict, argparse namespace or ReservationArgs).
+
+        In non-simulation mode the AWS profile is prompted for unless one is passed in.
+        """
+        if isinstance(args, ReservationArgs):
             self.args = args
+        else:
+            self.args = ReservationArgs.from_dict(args if isinstance(args, dict) else vars(args))
 
         # Configure logging
-        logging.getLogger().setLevel(getattr(logging, self.args.log_level))
+        logging.getLogger().setLevel(LOG_LEVELS[self.args.log_level])
 
-        # Set retry configuration
-        self.config = RETRY_CONFIG[self.args.retry_config]
-        self.max_retries = getattr(self.args, 'custom_max_retries', None) or self.config['max_retries']
-        self.retry_delay = getattr(self.args, 'custom_retry_delay', None) or self.config['retry_delay_seconds']
-        self.max_wait_time = getattr(self.args, 'max_wait_time', 3600)
+        # Set by cancel() to stop the retry loop, including a backoff wait in progress
+        self._cancel_event = threading.Event()
 
         if not self.args.simulation_mode:
             # ############################################################
@@ -403,50 +624,176 @@ class CapacityReservationManager:
             # 3. Enable real AWS API calls
             # ############################################################
             
-            # Get available profiles
-            profiles = get_aws_profiles()
-            
-            if not profiles:
-                logger.warning("No AWS profiles found. Please configure AWS credentials.")
-                sys.exit(1)
-            
-            # Let user choose profile if not in simulation mode
-            profile_questions = [
-                inquirer.List('profile',
-                            message="Choose AWS Profile",
-                            choices=profiles,
-                            default=profiles[0] if profiles else None)
-            ]
-            
-            profile_answers = inquirer.prompt(profile_questions)
-            if not profile_answers:
-                logger.error("AWS profile selection cancelled")
-                sys.exit(1)
+            if profile is None:
+                # Get available profiles
+                profiles = get_aws_profiles()
+
+                if not profiles:
+                    logger.warning("No AWS profiles found. Please configure AWS credentials.")
+                    sys.exit(1)
+
+                import questionary
+
+                # Let user choose profile if not in simulation mode
+                profile = questionary.select("Choose AWS Profile",
+                                             choices=profiles,
+                                             default=profiles[0] if profiles else None).ask()
+                if not profile:
+                    logger.error("AWS profile selection cancelled")
+                    sys.exit(1)
                 
-            # Setup AWS session with chosen profile
-            session = setup_aws_session(profile_answers['profile'])
-            if not session:
+            # Setup AWS session with chosen profile - shared by every client this manager uses
+            self.profile = profile
+            self.session = setup_aws_session(profile)
+            if not self.session:
                 logger.error("Failed to setup AWS session")
                 sys.exit(1)
                 
-            self.ec2_client = session.client('ec2', region_name=self.args.region)
-            logger.info(f"Using AWS Profile: {profile_answers['profile']}")
+            self.ec2_client = _get_ec2_client(self.args.region, profile, self.max_retries)
+            logger.info("Using AWS Profile: %s", profile)
             
             # Get and display account info
-            sts = session.client('sts')
-            account_id = sts.get_caller_identity()['Account']
-            logger.info(f"AWS Account ID: {account_id}")
+            self.account_id = _get_account_id(profile)
+            logger.info("AWS Account ID: %s", self.account_id)
         else:
             # Simulation mode - No real AWS calls will be made
-            self.ec2_client = boto3.client('ec2', region_name=self.args.region)
+            from botocore.stub import Stubber
+
+            # Own client (Stubber hooks into it) off the shared default session
+            self.profile = None
+            self.session = _get_session()
+            self.ec2_client = self.session.client('ec2', region_name=self.args.region,
+                                                  config=_client_config(self.max_retries))
             self.stubber = Stubber(self.ec2_client)
             logger.info("Running in simulation mode")
             self.setup_simulation()
 
-        logger.info(f"Initialized with {self.config['description']}")
+        logger.info("Initialized with %s", self.config['description'])
+
+    @classmethod
+    def create_reservations_bulk(cls, arg_list, max_workers=BULK_MAX_WORKERS):
+        """Create several reservations concurrently, returns a (success, reservation) tuple per entry.
+
+        Managers are built up front in the calling thread since boto3 sessions
+        aren't thread safe. The AWS profile is chosen once, and managers with
+        the same region and retry settings (max_retries) share one cached EC2
+        client - and with it botocore's adaptive rate limiter, so throttling
+        slows those workers down together.
+        An entry that fails with an unexpected error (e.g. a connection error)
+        gets (False, None) rather than hiding the other entries' reservations.
+        On Ctrl-C every manager is cancelled, so no worker starts another
+        attempt, and the KeyboardInterrupt is re-raised.
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait
+
+        managers = []
+        profile = None
+        for args in arg_list:
+            manager = cls(args, profile=profile)
+            profile = profile or manager.profile
+            managers.append(manager)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(manager.create_reservation) for manager in managers]
+            try:
+                wait(futures)
+            except BaseException:
+                # Stop queued entries and every retry loop before the pool is joined
+                for future in futures:
+                    future.cancel()
+                for manager in managers:
+                    manager.cancel()
+                raise
+
+        results = []
+        for future in futures:
+            error = future.exception()
+            if error is not None:
+                logger.error("Error creating capacity reservation: %s", error)
+                results.append((False, None))
+            else:
+                results.append(future.result())
+        return results
+
+    # Values derived from args - computed on first use, then cached
+
+    @cached_property
+    def config(self):
+        """Retry configuration selected by args.retry_config"""
+        return RETRY_CONFIG[self.args.retry_config]
+
+    @cached_property
+    def max_retries(self):
+        return self.args.custom_max_retries or self.config['max_retries']
+
+    @cached_property
+    def retry_delay(self):
+        return self.args.custom_retry_delay or self.config['retry_delay_seconds']
+
+    @cached_property
+    def max_delay(self):
+        # Never cap below an explicitly requested --retry-delay
+        return max(self.retry_delay, self.config['max_delay_seconds'])
+
+    @cached_property
+    def max_wait_time(self):
+        return self.args.max_wait_time
+
+    @cached_property
+    def _tags(self):
+        # Tags stay a plain dict on args and are converted to the AWS shape only here
+        return _aws_tags(self.args.tags)
+
+    @cached_property
+    def _tag_specs(self):
+        return [{
+            'ResourceType': 'capacity-reservation',
+            'Tags': self._tags
+        }] if self._tags else []
+
+    @cached_property
+    def _base_params(self):
+        # Built once - the parameters don't change between attempts
+        return self._build_params()
+
+    def _build_params(self):
+        """Build the create_capacity_reservation parameters (also the Stubber's expected_params)"""
+        params = {
+            'InstanceType': self.args.instance_type,
+            'InstancePlatform': self.args.platform,
+            'AvailabilityZone': self.args.availability_zone,
+            'Tenancy': self.args.tenancy,
+            'InstanceCount': self.args.instance_count,
+            'EbsOptimized': self.args.ebs_optimized,
+            'EndDateType': self.args.end_date_type,
+            'TagSpecifications': self._tag_specs
+        }
+
+        # Add EndDate only if it's a limited reservation
+        if self.args.end_date_type == 'limited' and self.args.end_date:
+            params['EndDate'] = self.args.end_date
+
+        return params
 
     def get_instance_metadata(self, instance_id):
         """Get relevant metadata from an existing instance for capacity reservation"""
+        return self.get_instances_metadata([instance_id]).get(instance_id)
+
+    def get_instances_metadata(self, instance_ids):
+        """Get metadata for several instances, keyed by instance ID.
+
+        IDs are sent to describe_instances as an 'instance-id' filter in batches
+        of up to DESCRIBE_INSTANCES_BATCH_SIZE, so N instances cost one call per
+        batch instead of one call each. Filtering (rather than InstanceIds)
+        means an ID that doesn't exist is just left out instead of failing its
+        whole batch. If a call fails, the instances fetched before it are
+        still returned.
+        """
+        from botocore.exceptions import ClientError
+
+        instance_ids = list(dict.fromkeys(instance_ids))  # Drop duplicates, keep order
+        instances = {}
+        failed = False
         try:
             # ############################################################
             # WARNING: This will make real AWS API calls
@@ -454,90 +801,83 @@ class CapacityReservationManager:
             # 1. Query your AWS account for instance details
             # 2. Access instance metadata
             # ############################################################
-            response = self.ec2_client.describe_instances(InstanceIds=[instance_id])
-            
-            if not response['Reservations'] or not response['Reservations'][0]['Instances']:
-                logger.error(f"Instance {instance_id} not found")
-                return None
-                
-            instance = response['Reservations'][0]['Instances'][0]
-            
-            # Extract relevant metadata for capacity reservation
-            metadata = {
-                'instance_type': instance['InstanceType'],
-                'platform': instance.get('Platform', 'Linux/UNIX'),  # Default to Linux/UNIX if not specified
-                'availability_zone': instance['Placement']['AvailabilityZone'],
-                'tenancy': instance['Placement']['Tenancy'],
-                'ebs_optimized': instance['EbsOptimized'],
-                # Copy relevant tags
-                'tags': {tag['Key']: tag['Value'] for tag in instance.get('Tags', [])
-                        if tag['Key'] in ['Name', 'Environment', 'Project', 'Owner']},
-                # Region from AZ
-                'region': instance['Placement']['AvailabilityZone'][:-1]
-            }
-            
-            # Handle platform-specific details
-            if 'Platform' in instance and instance['Platform'] == 'windows':
-                if 'license' in instance.get('LicenseSpecifications', [{}])[0].get('LicenseConfigurationArn', '').lower():
-                    if 'sql' in instance.get('LicenseSpecifications', [{}])[0].get('LicenseConfigurationArn', '').lower():
-                        if 'enterprise' in instance.get('LicenseSpecifications', [{}])[0].get('LicenseConfigurationArn', '').lower():
-                            metadata['platform'] = 'Windows with SQL Server Enterprise'
-                        elif 'standard' in instance.get('LicenseSpecifications', [{}])[0].get('LicenseConfigurationArn', '').lower():
-                            metadata['platform'] = 'Windows with SQL Server Standard'
-                        else:
-                            metadata['platform'] = 'Windows with SQL Server Web'
-                    else:
-                        metadata['platform'] = 'Windows'
-
-            logger.info("\nInstance Metadata Summary:")
-            logger.info("-" * 40)
-            logger.info(f"Instance ID:        {instance_id}")
-            logger.info(f"Instance Type:      {metadata['instance_type']}")
-            logger.info(f"Platform:           {metadata['platform']}")
-            logger.info(f"Availability Zone:  {metadata['availability_zone']}")
-            logger.info(f"Tenancy:           {metadata['tenancy']}")
-            logger.info(f"EBS Optimized:     {'Yes' if metadata['ebs_optimized'] else 'No'}")
-            if metadata['tags']:
-                logger.info("\nRelevant Tags:")
-                for key, value in metadata['tags'].items():
-                    logger.info(f"  {key}: {value}")
-            logger.info("-" * 40)
-            
-            return metadata
-            
+            paginator = self.ec2_client.get_paginator('describe_instances')
+            for start in range(0, len(instance_ids), DESCRIBE_INSTANCES_BATCH_SIZE):
+                batch = instance_ids[start:start + DESCRIBE_INSTANCES_BATCH_SIZE]
+                for page in paginator.paginate(Filters=[{'Name': 'instance-id', 'Values': batch}]):
+                    for reservation in page['Reservations']:
+                        for instance in reservation['Instances']:
+                            instances[instance['InstanceId']] = instance
         except ClientError as e:
             logger.error(f"Error getting instance metadata: {str(e)}")
-            return None
+            failed = True
 
-    def setup_simulation(self):
-        """Setup simulation responses for create_capacity_reservation"""
-        from datetime import datetime
-        import pytz
+        results = {}
+        for instance_id in instance_ids:
+            if instance_id not in instances:
+                # After a failed call, unfetched IDs may still exist - only report real misses
+                if not failed:
+                    logger.error(f"Instance {instance_id} not found")
+                continue
+            results[instance_id] = self._instance_metadata(instance_id, instances[instance_id])
+        return results
 
-        # Define expected parameters for the API call
-        expected_params = {
-            'InstanceType': self.args.instance_type,
-            'InstancePlatform': self.args.platform,
-            'AvailabilityZone': self.args.availability_zone,
-            'Tenancy': self.args.tenancy,
-            'InstanceCount': int(self.args.instance_count),  # Convert to int
-            'EbsOptimized': self.args.ebs_optimized,
-            'EndDateType': self.args.end_date_type,
-            'TagSpecifications': [{
-                'ResourceType': 'capacity-reservation',
-                'Tags': [{'Key': k, 'Value': v} for k, v in self.args.tags.items()]
-            }] if self.args.tags else []
+    def _instance_metadata(self, instance_id, instance):
+        """Extract the capacity reservation arguments from a describe_instances instance"""
+        # Extract relevant metadata for capacity reservation
+        metadata = {
+            'instance_type': instance['InstanceType'],
+            'platform': instance.get('Platform', 'Linux/UNIX'),  # Default to Linux/UNIX if not specified
+            'availability_zone': instance['Placement']['AvailabilityZone'],
+            'tenancy': instance['Placement']['Tenancy'],
+            'ebs_optimized': instance['EbsOptimized'],
+            # Copy relevant tags
+            'tags': {tag['Key']: tag['Value'] for tag in instance.get('Tags', [])
+                    if tag['Key'] in ['Name', 'Environment', 'Project', 'Owner']},
+            # Region from AZ
+            'region': instance['Placement']['AvailabilityZone'][:-1]
         }
+        
+        # Handle platform-specific details
+        if instance.get('Platform') == 'windows':
+            arn = (instance.get('LicenseSpecifications') or [{}])[0].get('LicenseConfigurationArn', '').lower()
+            if 'license' in arn and 'sql' in arn:
+                if 'enterprise' in arn:
+                    metadata['platform'] = 'Windows with SQL Server Enterprise'
+                elif 'standard' in arn:
+                    metadata['platform'] = 'Windows with SQL Server Standard'
+                else:
+                    metadata['platform'] = 'Windows with SQL Server Web'
+            elif 'license' in arn:
+                metadata['platform'] = 'Windows'
 
-        # Add EndDate only if it's a limited reservation
-        if self.args.end_date_type == 'limited' and self.args.end_date:
-            expected_params['EndDate'] = self.args.end_date
+        if logger.isEnabledFor(logging.INFO):
+            summary = [
+                "\nInstance Metadata Summary:",
+                "-" * 40,
+                f"Instance ID:        {instance_id}",
+                f"Instance Type:      {metadata['instance_type']}",
+                f"Platform:           {metadata['platform']}",
+                f"Availability Zone:  {metadata['availability_zone']}",
+                f"Tenancy:           {metadata['tenancy']}",
+                f"EBS Optimized:     {'Yes' if metadata['ebs_optimized'] else 'No'}",
+            ]
+            if metadata['tags']:
+                summary.append("\nRelevant Tags:")
+                summary.extend(f"  {key}: {value}" for key, value in metadata['tags'].items())
+            summary.append("-" * 40)
+            logger.info("\n".join(summary))
+        
+        return metadata
 
-        # Get current UTC time
-        current_time = datetime.now(pytz.UTC).isoformat()
+    def setup_simulation(self):
+        """Setup simulation responses for create_capacity_reservation"""
+        # Expected parameters are the exact dict create_reservation sends.
+        # Stubber only reads it, so every queued response shares this one reference.
+        expected_params = self._base_params
 
-        # Convert instance count to int for response
-        instance_count = int(self.args.instance_count)
+        # Get current UTC time
+        current_time = datetime.now(timezone.utc).isoformat()
 
         # Define success response that matches AWS API format
         success_response = {
@@ -549,8 +889,8 @@ class CapacityReservationManager:
                 'InstancePlatform': self.args.platform,
                 'AvailabilityZone': self.args.availability_zone,
                 'Tenancy': self.args.tenancy,
-                'TotalInstanceCount': instance_count,  # Use converted int
-                'AvailableInstanceCount': instance_count,  # Use converted int
+                'TotalInstanceCount': self.args.instance_count,
+                'AvailableInstanceCount': self.args.instance_count,
                 'EbsOptimized': self.args.ebs_optimized,
                 'EphemeralStorage': False,
                 'State': 'active',
@@ -558,7 +898,7 @@ class CapacityReservationManager:
                 'EndDateType': self.args.end_date_type,
                 'InstanceMatchCriteria': 'open',
                 'CreateDate': current_time,
-                'Tags': [{'Key': k, 'Value': v} for k, v in self.args.tags.items()],
+                'Tags': self._tags,
                 'OutpostArn': '',
                 'CapacityReservationFleetId': '',
                 'PlacementGroupArn': '',
@@ -573,56 +913,56 @@ class CapacityReservationManager:
         if self.args.end_date_type == 'limited' and self.args.end_date:
             success_response['CapacityReservation']['EndDate'] = self.args.end_date
 
-        # Add simulation responses
-        if self.max_retries > 0:
-            # Add error responses for all but the last attempt
-            for _ in range(min(2, self.max_retries)):
-                self.stubber.add_client_error(
-                    'create_capacity_reservation',
-                    'InsufficientCapacityError',
-                    'There is not enough capacity available for your request.',
-                    expected_params=expected_params
-                )
+        # Add error responses before the successful one - all built from the same arguments
+        error_args = ('create_capacity_reservation',
+                      'InsufficientCapacityError',
+                      'There is not enough capacity available for your request.')
+        for _ in itertools.repeat(None, min(self.args.sim_failures_before_success, self.max_retries)):
+            self.stubber.add_client_error(*error_args, expected_params=expected_params)
 
         # Add successful response for the last attempt
         self.stubber.add_response('create_capacity_reservation', success_response, expected_params)
         self.stubber.activate()
 
+    def cancel(self):
+        """Cancel a running create_reservation (safe to call from another thread or a signal handler).
+
+        Cancelling is one-shot: the manager stays cancelled, so a later
+        create_reservation returns (False, None) without calling AWS.
+        """
+        self._cancel_event.set()
+
+    def get_backoff_delay(self, attempt):
+        """Get the jittered exponential backoff delay before the next attempt"""
+        # Exponential growth from retry_delay, capped at max_delay
+        delay = min(self.max_delay, self.retry_delay * (2 ** (attempt - 1)))
+
+        # Full jitter: spread retries so concurrent runs don't hit the API in lockstep
+        return random.uniform(0, delay)
+
     def create_reservation(self):
         """Create the capacity reservation"""
+        from botocore.exceptions import ClientError
+
         start_time = time.time()
         attempt = 0
         last_error = None
+        params = self._base_params
 
         while attempt < self.max_retries:
+            if self._cancel_event.is_set():
+                logger.warning("Reservation request cancelled")
+                return False, None
+
             attempt += 1
             elapsed_time = time.time() - start_time
 
             if elapsed_time >= self.max_wait_time:
-                logger.error(f"Maximum wait time of {self.max_wait_time} seconds exceeded")
+                logger.error("Maximum wait time of %s seconds exceeded", self.max_wait_time)
                 return False, None
 
             try:
-                logger.info(f"\nAttempt {attempt} of {self.max_retries}")
-
-                # Build the API parameters
-                params = {
-                    'InstanceType': self.args.instance_type,
-                    'InstancePlatform': self.args.platform,
-                    'AvailabilityZone': self.args.availability_zone,
-                    'Tenancy': self.args.tenancy,
-                    'InstanceCount': int(self.args.instance_count),  # Convert to int
-                    'EbsOptimized': self.args.ebs_optimized,
-                    'EndDateType': self.args.end_date_type,
-                    'TagSpecifications': [{
-                        'ResourceType': 'capacity-reservation',
-                        'Tags': [{'Key': k, 'Value': v} for k, v in self.args.tags.items()]
-                    }] if self.args.tags else []
-                }
-
-                # Add EndDate only if it's a limited reservation
-                if self.args.end_date_type == 'limited' and self.args.end_date:
-                    params['EndDate'] = self.args.end_date
+                logger.info("\nAttempt %d of %d", attempt, self.max_retries)
 
                 # ############################################################
                 # WARNING: This will make a real AWS API call if not in simulation mode
@@ -636,12 +976,12 @@ class CapacityReservationManager:
                 
                 reservation = response['CapacityReservation']
                 
-                logger.info(f"Successfully created capacity reservation: {reservation['CapacityReservationId']}")
-                logger.info(f"Status: {reservation['State']}")
-                logger.info(f"Instance Type: {reservation['InstanceType']}")
-                logger.info(f"Instance Count: {reservation['TotalInstanceCount']}")
-                logger.info(f"Platform: {reservation['InstancePlatform']}")
-                logger.info(f"Availability Zone: {reservation['AvailabilityZone']}")
+                logger.info("Successfully created capacity reservation: %s", reservation['CapacityReservationId'])
+                logger.info("Status: %s", reservation['State'])
+                logger.info("Instance Type: %s", reservation['InstanceType'])
+                logger.info("Instance Count: %s", reservation['TotalInstanceCount'])
+                logger.info("Platform: %s", reservation['InstancePlatform'])
+                logger.info("Availability Zone: %s", reservation['AvailabilityZone'])
                 
                 return True, reservation
 
@@ -650,129 +990,167 @@ class CapacityReservationManager:
                 error_message = e.response['Error']['Message']
                 last_error = e
 
-                if error_code == 'InsufficientCapacityError':
-                    logger.warning(f"Insufficient capacity: {error_message}")
+                if error_code in RETRYABLE_ERROR_CODES:
+                    logger.warning("Insufficient capacity: %s", error_message)
                     
                     if attempt < self.max_retries:
-                        logger.info(f"Retrying in {self.retry_delay} seconds...")
-                        time.sleep(self.retry_delay)
+                        # Don't sleep into the max_wait_time deadline only to give up on waking
+                        remaining_time = self.max_wait_time - (time.time() - start_time)
+                        sleep_time = self.get_backoff_delay(attempt)
+                        if sleep_time >= remaining_time:
+                            logger.error("Maximum wait time of %s seconds would be exceeded before the next attempt",
+                                         self.max_wait_time)
+                            break
+
+                        logger.info("Retrying in %.2f seconds...", sleep_time)
+                        if self._cancel_event.wait(sleep_time):
+                            logger.warning("Reservation request cancelled")
+                            return False, None
                     continue
                 else:
-                    logger.error(f"Error creating capacity reservation: {error_code} - {error_message}")
+                    logger.error("Error creating capacity reservation: %s - %s", error_code, error_message)
                     break
 
         if last_error:
-            logger.error(f"Failed after {attempt} attempts. Last error: {str(last_error)}")
+            logger.error("Failed after %d attempts. Last error: %s", attempt, last_error)
         return False, None
 
-def parse_args():
-    """Parse command line arguments"""
+def _build_parser():
+    """Build the parser for the options every mode uses (mode, retry and execution settings)"""
+    # -h is added with the reservation options so the help always lists them
     parser = argparse.ArgumentParser(
-        description='AWS EC2 Capacity Reservation CLI with simulation capabilities'
+        description='AWS EC2 Capacity Reservation CLI with simulation capabilities',
+        add_help=False
     )
     
     parser.add_argument('--non-interactive',
                        action='store_true',
                        help='Run in non-interactive mode with command line arguments')
     
-    # Only parse other arguments if --non-interactive is specified
-    args, remaining = parser.parse_known_args()
+    # Retry Configuration
+    retry_group = parser.add_argument_group('Retry Configuration')
+    retry_group.add_argument('--retry-config',
+                           choices=_RETRY_CONFIG_KEYS,
+                           default='QUICK_RETRY',
+                           help='Predefined retry configuration')
+    retry_group.add_argument('--custom-max-retries',
+                           type=int,
+                           default=0,
+                           help='Override max retries (0 to use retry config value)')
+    retry_group.add_argument('--custom-retry-delay',
+                           type=int,
+                           default=0,
+                           help='Override retry delay in seconds (0 to use retry config value)')
+    retry_group.add_argument('--max-wait-time',
+                           type=int,
+                           default=3600,
+                           help='Maximum total wait time in seconds')
     
-    if args.non_interactive:
-        # Instance Configuration
-        instance_group = parser.add_argument_group('Instance Configuration')
-        instance_group.add_argument('--instance-type', 
-                                  default='t2.micro',
-                                  choices=[inst for types in INSTANCE_TYPE_CHOICES.values() for inst in types],
-                                  help='EC2 instance type')
-        instance_group.add_argument('--instance-count', 
-                                  type=int,
-                                  default=1,
-                                  help='Number of instances to reserve')
-        instance_group.add_argument('--platform',
-                                  default='Linux/UNIX',
-                                  choices=PLATFORM_CHOICES,
-                                  help='Operating system platform')
-        instance_group.add_argument('--existing-instance',
-                                  help='Base reservation on existing instance ID')
-        
-        # Location Configuration
-        location_group = parser.add_argument_group('Location Configuration')
-        location_group.add_argument('--region',
-                                  default='us-west-2',
-                                  choices=REGION_CHOICES,
-                                  help='AWS region')
-        location_group.add_argument('--availability-zone',
-                                  help='Availability zone (default: first AZ in region)')
-        
-        # Reservation Configuration
-        reservation_group = parser.add_argument_group('Reservation Configuration')
-        reservation_group.add_argument('--ebs-optimized',
-                                     action='store_true',
-                                     help='Enable EBS optimization')
-        reservation_group.add_argument('--tenancy',
-                                     choices=['default', 'dedicated'],
-                                     default='default',
-                                     help='Instance tenancy')
-        reservation_group.add_argument('--end-date-type',
-                                     choices=['unlimited', 'limited'],
-                                     default='unlimited',
-                                     help='Reservation end date type')
-        reservation_group.add_argument('--end-date',
-                                     help='End date for limited reservations (ISO 8601 format)')
-        reservation_group.add_argument('--tags',
-                                     type=json.loads,
-                                     default='{}',
-                                     help='Tags in JSON format (e.g., \'{"Key": "Value"}\')')
-        
-        # Retry Configuration
-        retry_group = parser.add_argument_group('Retry Configuration')
-        retry_group.add_argument('--retry-config',
-                               choices=list(RETRY_CONFIG.keys()),
-                               default='QUICK_RETRY',
-                               help='Predefined retry configuration')
-        retry_group.add_argument('--custom-max-retries',
-                               type=int,
-                               default=0,
-                               help='Override max retries (0 to use retry config value)')
-        retry_group.add_argument('--custom-retry-delay',
-                               type=int,
-                               default=0,
-                               help='Override retry delay in seconds (0 to use retry config value)')
-        retry_group.add_argument('--max-wait-time',
-                               type=int,
-                               default=3600,
-                               help='Maximum total wait time in seconds')
-        
-        # Execution Configuration
-        exec_group = parser.add_argument_group('Execution Configuration')
-        exec_group.add_argument('--simulation-mode',
-                              action='store_true',
-                              default=True,
-                              help='Run in simulation mode')
-        exec_group.add_argument('--log-level',
-                              choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
-                              default='INFO',
-                              help='Logging level')
-        exec_group.add_argument('--cleanup-on-failure',
-                              action='store_true',
-                              help='Clean up failed reservations')
-        
+    # Execution Configuration
+    exec_group = parser.add_argument_group('Execution Configuration')
+    exec_group.add_argument('--simulation-mode',
+                          action='store_true',
+                          default=True,
+                          help='Run in simulation mode')
+    exec_group.add_argument('--sim-failures-before-success',
+                          type=int,
+                          default=2,
+                          help='Simulated capacity errors before the reservation succeeds (simulation mode)')
+    exec_group.add_argument('--log-level',
+                          choices=list(LOG_LEVELS),
+                          default='INFO',
+                          help='Logging level')
+    exec_group.add_argument('--cleanup-on-failure',
+                          action='store_true',
+                          help='Clean up failed reservations')
+
+    return parser
+
+def _add_reservation_arguments(parser):
+    """Add the instance, location and reservation options and -h/--help"""
+    parser.add_argument('-h', '--help',
+                       action='help',
+                       help='show this help message and exit')
+    
+    # Instance Configuration
+    instance_group = parser.add_argument_group('Instance Configuration')
+    instance_group.add_argument('--instance-type', 
+                              default='t2.micro',
+                              choices=ALL_INSTANCE_TYPES,
+                              help='EC2 instance type')
+    instance_group.add_argument('--instance-count', 
+                              type=int,
+                              default=1,
+                              help='Number of instances to reserve')
+    instance_group.add_argument('--platform',
+                              default='Linux/UNIX',
+                              choices=PLATFORM_CHOICES,
+                              help='Operating system platform')
+    instance_group.add_argument('--existing-instance',
+                              help='Base reservation on existing instance ID')
+    
+    # Location Configuration
+    location_group = parser.add_argument_group('Location Configuration')
+    location_group.add_argument('--region',
+                              default='us-west-2',
+                              choices=REGION_CHOICES,
+                              help='AWS region')
+    location_group.add_argument('--availability-zone',
+                              help='Availability zone (default: first AZ in region)')
+    
+    # Reservation Configuration
+    reservation_group = parser.add_argument_group('Reservation Configuration')
+    reservation_group.add_argument('--ebs-optimized',
+                                 action='store_true',
+                                 help='Enable EBS optimization')
+    reservation_group.add_argument('--tenancy',
+                                 choices=['default', 'dedicated'],
+                                 default='default',
+                                 help='Instance tenancy')
+    reservation_group.add_argument('--end-date-type',
+                                 choices=['unlimited', 'limited'],
+                                 default='unlimited',
+                                 help='Reservation end date type')
+    reservation_group.add_argument('--end-date',
+                                 help='End date for limited reservations (ISO 8601 format)')
+    reservation_group.add_argument('--tags',
+                                 type=parse_tags,
+                                 default={},
+                                 help='Tags in JSON format (e.g., \'{"Key": "Value"}\')')
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = _build_parser()
+    args, remaining = parser.parse_known_args()
+
+    # The interactive prompts ask for the reservation options, so they are only
+    # built when they can be used: non-interactive runs, --help, or any option
+    # the common parser doesn't know (which also gets the usual argparse errors)
+    if args.non_interactive or remaining or not sys.stdin.isatty():
+        _add_reservation_arguments(parser)
         args = parser.parse_args()
-        
-        # If using existing instance, fetch its metadata
-        if args.existing_instance:
-            temp_manager = CapacityReservationManager({'simulation_mode': False})
-            metadata = temp_manager.get_instance_metadata(args.existing_instance)
-            if metadata:
-                # Update args with instance metadata if not explicitly specified
-                for key, value in metadata.items():
-                    if not getattr(args, key.replace('-', '_'), None):
-                        setattr(args, key.replace('-', '_'), value)
-        
-        return vars(args)  # Convert namespace to dictionary
-    else:
-        return get_interactive_choices()
+
+    # Prompts can't be answered without a terminal (CI, pipes) - use the command line arguments
+    if not args.non_interactive and not sys.stdin.isatty():
+        logger.info("stdin is not a TTY, running in non-interactive mode")
+        args.non_interactive = True
+
+    if not args.non_interactive:
+        # Prompt answers win; retry/execution options still come from the command line
+        return get_interactive_choices(vars(args))
+    
+    # If using existing instance, fetch its metadata
+    if args.existing_instance:
+        temp_manager = CapacityReservationManager({'simulation_mode': False})
+        metadata = temp_manager.get_instance_metadata(args.existing_instance)
+        if metadata:
+            # Update args with instance metadata if not explicitly specified.
+            # Metadata keys are already the snake_case argparse dests.
+            for key, value in metadata.items():
+                if not getattr(args, key, None):
+                    setattr(args, key, value)
+    
+    return vars(args)  # Convert namespace to dictionary
 
 def main():
     args = parse_args()
@@ -2,7 +2,10 @@
 # It implements retry logic for handling InsufficientCapacity errors
 # The script includes proper error handling, logging, and cleanup functionality
 
-import boto3
+import functools
+from concurrent.futures import ThreadPoolExecutor, wait
+import random
+import threading
 import time
 import logging
 from botocore.exceptions import ClientError
@@ -15,43 +18,105 @@ logger = logging.getLogger(__name__)
 # Centralized retry configuration - matches test version for consistency
 # Each configuration specifies:
 # - max_retries: maximum number of attempts to make
-# - retry_delay_seconds: time to wait between attempts
+# - retry_delay_seconds: base backoff - doubled on each attempt with 'full' or 'none'
+#   jitter, the shortest wait with 'decorrelated' jitter
+# - max_delay_seconds: upper bound for a single backoff
+# - jitter_mode: how backoffs are randomized - 'none', 'full' or 'decorrelated'
 # - description: human-readable explanation of the configuration
 RETRY_CONFIG = {
     'QUICK_RETRY': {
         'max_retries': 3,
         'retry_delay_seconds': 1,
+        'max_delay_seconds': 4,
+        'jitter_mode': 'full',
         'description': 'Quick retries with short delays'
     },
     'SLOW_RETRY': {
         'max_retries': 2,
         'retry_delay_seconds': 2,
+        'max_delay_seconds': 8,
+        'jitter_mode': 'full',
         'description': 'Fewer retries with longer delays'
     },
     'EXTENSIVE_RETRY': {
         'max_retries': 20,
-        'retry_delay_seconds': 3,
-        'description': 'Many retries with longer delays'
+        'retry_delay_seconds': 1,
+        'max_delay_seconds': 3,
+        'jitter_mode': 'decorrelated',
+        'description': 'Many retries with short, decorrelated-jitter delays'
     }
 }
 
+@functools.lru_cache(maxsize=8)
+def _get_ec2_client(region_name, max_attempts=3):
+    """
+    Get a shared EC2 client for a region. Creating a client loads the service
+    model and resolves endpoints, so it is done once per region per process.
+    
+    Throttling and transient errors are retried by botocore in adaptive mode,
+    up to max_attempts calls in total, which also rate-limits the client when
+    AWS throttles it. InsufficientCapacity is not retryable there, so
+    create_capacity_reservation keeps its own loop.
+    """
+    # boto3 loads its service models on import - only pay for it once a client is needed
+    import boto3
+    from botocore.config import Config
+
+    config = Config(retries={'total_max_attempts': max_attempts, 'mode': 'adaptive'})
+    return boto3.client('ec2', region_name=region_name, config=config)
+
 class CapacityReservationManager:
-    def __init__(self, region_name='us-west-2', retry_config='QUICK_RETRY'):
+    def __init__(self, region_name='us-west-2', retry_config='QUICK_RETRY', max_wait_time=3600):
         """
         Initialize the Capacity Reservation Manager with AWS credentials and retry configuration.
         
         Args:
             region_name (str): AWS region name
             retry_config (str): Key from RETRY_CONFIG dictionary
+            max_wait_time (int): Maximum total time in seconds to keep retrying
         """
-        # Create a real AWS EC2 client - requires proper AWS credentials
-        self.ec2_client = boto3.client('ec2', region_name=region_name)
         # Load the specified retry configuration
         self.config = RETRY_CONFIG[retry_config]
         self.max_retries = self.config['max_retries']
+        # Create a real AWS EC2 client - requires proper AWS credentials
+        self.ec2_client = _get_ec2_client(region_name, self.max_retries)
         self.retry_delay = self.config['retry_delay_seconds']
+        self.max_delay = self.config['max_delay_seconds']
+        self.jitter_mode = self.config['jitter_mode']
+        self.max_wait_time = max_wait_time
+        # Set by cancel() to stop retrying, including a backoff wait in progress
+        self._cancel_event = threading.Event()
         logger.info(f"Initialized with {self.config['description']}")
 
+    def cancel(self):
+        """
+        Stop retrying in every running create_capacity_reservation call. Safe to
+        call from another thread. Cancelling is one-shot: later calls on this
+        manager return None without calling AWS.
+        """
+        self._cancel_event.set()
+
+    def get_backoff_delay(self, attempt, previous_delay=None):
+        """
+        Get the wait before the next retry, according to the jitter mode:
+        - 'full': uniform(0, min(max_delay, retry_delay * 2**attempt)) - randomizing
+          the whole interval keeps concurrent callers from retrying in lockstep
+        - 'decorrelated': min(max_delay, uniform(retry_delay, previous_delay * 3)) -
+          each wait grows from the last one rather than from the attempt number
+        - 'none': min(max_delay, retry_delay * 2**attempt)
+        
+        Args:
+            attempt (int): Zero-based number of the attempt that just failed
+            previous_delay (float): The previous wait, None before the first retry
+        """
+        if self.jitter_mode == 'decorrelated':
+            previous_delay = previous_delay or self.retry_delay
+            return min(self.max_delay, random.uniform(self.retry_delay, previous_delay * 3))
+        delay = min(self.max_delay, self.retry_delay * 2 ** attempt)
+        if self.jitter_mode == 'full':
+            return random.uniform(0, delay)
+        return delay
+
     def create_capacity_reservation(self, instance_type, instance_count, 
                                  availability_zone, platform='Linux/UNIX'):
         """
@@ -66,50 +131,149 @@ class CapacityReservationManager:
         Returns:
             dict: Reservation details if successful, None if all retries failed
         """
-        attempt = 0
+        params = {
+            'InstanceType': instance_type,
+            'InstancePlatform': platform,
+            'AvailabilityZone': availability_zone,
+            'InstanceCount': instance_count,
+            'EndDateType': 'unlimited'  # Reservation doesn't expire automatically
+        }
+        start_time = time.monotonic()
+        if self._cancel_event.is_set():
+            logger.warning("Reservation request cancelled")
+            return None
+        
+        # The first attempt usually succeeds - try it straight away and only
+        # enter the retry loop on an InsufficientCapacity error
+        logger.info("\nAttempt 1 of %d", self.max_retries)
+        try:
+            return self._attempt_create(params)
+        except ClientError as e:
+            if not self._is_capacity_error(e):
+                raise
+        
+        return self._retry_attempts(params, start_time)
+
+    def _attempt_create(self, params):
+        """
+        Make a single create_capacity_reservation call.
+        
+        Args:
+            params (dict): create_capacity_reservation keyword arguments
+        
+        Returns:
+            dict: Reservation details - raises ClientError if the call fails
+        """
+        # Make the actual AWS API call to create a capacity reservation
+        # This will fail with InsufficientCapacity if AWS cannot fulfill the request
+        response = self.ec2_client.create_capacity_reservation(**params)
+        
+        # Extract and log the reservation ID on successful creation
+        reservation_id = response['CapacityReservation']['CapacityReservationId']
+        logger.info("Successfully created capacity reservation: %s", reservation_id)
+        return response['CapacityReservation']
+
+    def _is_capacity_error(self, error):
+        """
+        Log a failed attempt and report whether it is worth retrying.
+        
+        Args:
+            error (ClientError): The error raised by the attempt
         
-        while attempt < self.max_retries:
+        Returns:
+            bool: True for InsufficientCapacity errors, False for anything else
+        """
+        # Extract error details from the AWS error response
+        error_code = error.response['Error']['Code']
+        error_message = error.response['Error']['Message']
+        
+        if error_code == 'InsufficientCapacity':
+            logger.warning("Insufficient capacity error: %s", error_message)
+            return True
+        
+        # For non-capacity errors (e.g., permissions, invalid parameters)
+        # the caller raises immediately - no retry
+        logger.error("AWS Error: %s - %s", error_code, error_message)
+        return False
+
+    def _retry_attempts(self, params, start_time):
+        """
+        Retry a reservation after a failed first attempt, backing off between attempts.
+        
+        Args:
+            params (dict): create_capacity_reservation keyword arguments
+            start_time (float): time.monotonic() when the first attempt started
+        
+        Returns:
+            dict: Reservation details if successful, None if all retries failed
+        """
+        # Read the loop's settings once - they don't change between attempts
+        max_retries = self.max_retries
+        max_wait_time = self.max_wait_time
+        get_backoff_delay = self.get_backoff_delay
+        attempt_create = self._attempt_create
+        delay = None
+        
+        for attempt in range(1, max_retries):
+            delay = get_backoff_delay(attempt - 1, delay)
+            # Stop early rather than sleep past the total wait budget
+            remaining_time = max_wait_time - (time.monotonic() - start_time)
+            if delay >= remaining_time:
+                logger.error("Maximum wait time of %d seconds exceeded", max_wait_time)
+                break
+            logger.info("Waiting %.1f seconds before retrying...", delay)
+            if self._cancel_event.wait(delay):
+                logger.warning("Reservation request cancelled")
+                return None
+            
+            logger.info("\nAttempt %d of %d", attempt + 1, max_retries)
             try:
-                logger.info(f"\nAttempt {attempt + 1} of {self.max_retries}")
-                
-                # Make the actual AWS API call to create a capacity reservation
-                # This will fail with InsufficientCapacity if AWS cannot fulfill the request
-                response = self.ec2_client.create_capacity_reservation(
-                    InstanceType=instance_type,
-                    InstancePlatform=platform,
-                    AvailabilityZone=availability_zone,
-                    InstanceCount=instance_count,
-                    EndDateType='unlimited'  # Reservation doesn't expire automatically
-                )
-                
-                # Extract and log the reservation ID on successful creation
-                reservation_id = response['CapacityReservation']['CapacityReservationId']
-                logger.info(f"Successfully created capacity reservation: {reservation_id}")
-                return response['CapacityReservation']
-                
+                return attempt_create(params)
             except ClientError as e:
-                # Extract error details from the AWS error response
-                error_code = e.response['Error']['Code']
-                error_message = e.response['Error']['Message']
-                
-                if error_code == 'InsufficientCapacity':
-                    # Handle capacity-specific errors with retry logic
-                    logger.warning(f"Insufficient capacity error: {error_message}")
-                    
-                    if attempt < self.max_retries - 1:
-                        logger.info(f"Waiting {self.retry_delay} seconds before retrying...")
-                        time.sleep(self.retry_delay)
-                    
-                    attempt += 1
-                else:
-                    # For non-capacity errors (e.g., permissions, invalid parameters)
-                    # log the error and raise immediately - no retry
-                    logger.error(f"AWS Error: {error_code} - {error_message}")
+                if not self._is_capacity_error(e):
                     raise
         
         logger.error("Max retries exceeded. Failed to create capacity reservation.")
         return None
 
+    def create_capacity_reservations(self, requests, max_workers=8):
+        """
+        Create several capacity reservations concurrently, each with its own retry loop.
+        Backoff sleeps overlap instead of adding up, so the total time is close to
+        that of the slowest reservation. boto3 clients are thread safe, so all
+        workers share this manager's client. On Ctrl-C the manager is cancelled,
+        so no worker starts another attempt, and the KeyboardInterrupt is re-raised.
+        
+        Args:
+            requests (list): Dicts of create_capacity_reservation arguments
+                             (instance_type, instance_count, availability_zone, platform)
+            max_workers (int): Maximum number of reservations attempted at once
+        
+        Returns:
+            list: A (reservation, error) tuple for each request, in order -
+                  (details, None) if successful, (None, None) if all retries failed
+                  and (None, exception) if the request raised. A failed request
+                  doesn't hide the others, so the reservations that were created
+                  can still be used or passed to cleanup_reservations.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self.create_capacity_reservation, **request)
+                       for request in requests]
+            try:
+                wait(futures)
+            except BaseException:
+                # Stop queued requests and every retry loop before the pool is joined
+                for future in futures:
+                    future.cancel()
+                self.cancel()
+                raise
+        
+        results = []
+        for future in futures:
+            error = future.exception()
+            results.append((None, error) if error is not None else (future.result(), None))
+        return results
+
     def cleanup_reservation(self, reservation_id):
         """
         Clean up a capacity reservation by canceling it.
@@ -128,6 +292,25 @@ class CapacityReservationManager:
             logger.error(f"Error canceling reservation: {e}")
             raise
 
+    def cleanup_reservations(self, reservation_ids):
+        """
+        Cancel several capacity reservations concurrently, e.g. after a partly
+        failed bulk create. Every cancel is attempted; the first failure is
+        re-raised once they have all finished.
+        
+        Args:
+            reservation_ids (list): IDs of the capacity reservations to cancel
+        """
+        if not reservation_ids:
+            return
+        
+        # boto3 clients are thread safe - all workers share this manager's client
+        with ThreadPoolExecutor(max_workers=min(len(reservation_ids), 10)) as executor:
+            futures = [executor.submit(self.cleanup_reservation, reservation_id)
+                       for reservation_id in reservation_ids]
+        for future in futures:
+            future.result()
+
 def main():
     # Example usage of the CapacityReservationManager
     # Uses the extensive retry configuration for maximum attempts
@@ -2,51 +2,108 @@
 # It demonstrates how to handle retry logic when capacity requests fail
 # The script allows configuring retry attempts, delays, and number of simulated failures
 
-import boto3
-import botocore
+import functools
+import random
 from botocore.stub import Stubber
 import time
+import logging
 from datetime import datetime
 from botocore.exceptions import ClientError
 
+# Set up logging configuration - same format as capacity_reservation_real.py
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
 # Centralized retry configuration
 # Modify these values to adjust the retry behavior
 RETRY_CONFIG = {
     'QUICK_RETRY': {
         'max_retries': 3,
         'retry_delay_seconds': 1,
+        'max_delay_seconds': 4,
+        'jitter_mode': 'full',
         'num_failures': 3,
         'description': 'Quick retries with short delays'
     },
     'SLOW_RETRY': {
         'max_retries': 2,
         'retry_delay_seconds': 2,
+        'max_delay_seconds': 8,
+        'jitter_mode': 'full',
         'num_failures': 2,
         'description': 'Fewer retries with longer delays'
     },
     'EXTENSIVE_RETRY': {
         'max_retries': 20,
-        'retry_delay_seconds': 3,
+        'retry_delay_seconds': 1,
+        'max_delay_seconds': 3,
+        'jitter_mode': 'decorrelated',
         'num_failures': 20,
-        'description': 'Many retries with longer delays'
+        'description': 'Many retries with short, decorrelated-jitter delays'
     }
 }
 
+@functools.lru_cache(maxsize=None)
+def _simulated_error_message(error_code):
+    """Get the message for a simulated error, formatted once per error code"""
+    return f'Simulated {error_code} error'
+
 class CapacityReservationSimulator:
-    def __init__(self, max_retries=3, retry_delay=1):
+    # Parameters every simulated create_capacity_reservation call is expected to send.
+    # The stubber only compares against them, so all queued responses share this dict.
+    _EXPECTED_PARAMS = {
+        'InstanceType': 't2.micro',
+        'InstancePlatform': 'Linux/UNIX',
+        'AvailabilityZone': 'us-west-2a',
+        'InstanceCount': 1
+    }
+
+    def __init__(self, max_retries=3, retry_delay=1, max_delay=30, max_wait_time=3600,
+                 jitter_mode='full'):
         """
         Initialize the simulator with configurable retry parameters.
         
         Args:
             max_retries (int): Maximum number of retry attempts
-            retry_delay (int): Delay between retries in seconds
+            retry_delay (int): Backoff before the first retry in seconds, doubled on each attempt
+            max_delay (int): Upper bound for a single backoff in seconds
+            max_wait_time (int): Maximum total time in seconds to keep retrying
+            jitter_mode (str): How backoffs are randomized - 'none', 'full' or 'decorrelated'
         """
+        # boto3 loads its service models on import - only pay for it once a simulator is built
+        import boto3
+
         # Create an EC2 client - this won't actually connect to AWS since we're using stubs
         self.ec2_client = boto3.client('ec2', region_name='us-west-2')
         # Create a stubber object that will intercept API calls to AWS
         self.stubber = Stubber(self.ec2_client)
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self.max_wait_time = max_wait_time
+        self.jitter_mode = jitter_mode
+
+    def get_backoff_delay(self, attempt, previous_delay=None):
+        """
+        Get the wait before the next retry, matching CapacityReservationManager
+        in capacity_reservation_real.py:
+        - 'full': uniform(0, min(max_delay, retry_delay * 2**attempt)) - randomizing
+          the whole interval keeps concurrent callers from retrying in lockstep
+        - 'decorrelated': min(max_delay, uniform(retry_delay, previous_delay * 3)) -
+          each wait grows from the last one rather than from the attempt number
+        - 'none': min(max_delay, retry_delay * 2**attempt)
+        
+        Args:
+            attempt (int): Zero-based number of the attempt that just failed
+            previous_delay (float): The previous wait, None before the first retry
+        """
+        if self.jitter_mode == 'decorrelated':
+            previous_delay = previous_delay or self.retry_delay
+            return min(self.max_delay, random.uniform(self.retry_delay, previous_delay * 3))
+        delay = min(self.max_delay, self.retry_delay * 2 ** attempt)
+        if self.jitter_mode == 'full':
+            return random.uniform(0, delay)
+        return delay
 
     def setup_failed_response(self, error_code='InsufficientCapacity'):
         """
@@ -57,42 +114,53 @@ class CapacityReservationSimulator:
         Args:
             error_code (str): The AWS error code to simulate
         """
-        # Create an error response that mimics AWS API error format
-        error_response = {
-            'Error': {
-                'Code': error_code,
-                'Message': f'Simulated {error_code} error'
-            }
-        }
-        
         # Configure the stubber to return an error when create_capacity_reservation
         # is called with these specific parameters
         self.stubber.add_client_error(
             'create_capacity_reservation',  # AWS API method to stub
             service_error_code=error_code,
-            service_message=f'Simulated {error_code} error',
+            service_message=_simulated_error_message(error_code),
             # Expected parameters that should match the actual API call
-            expected_params={
-                'InstanceType': 't2.micro',
-                'InstancePlatform': 'Linux/UNIX',
-                'AvailabilityZone': 'us-west-2a',
-                'InstanceCount': 1
-            }
+            expected_params=self._EXPECTED_PARAMS
         )
 
+    def setup_failed_responses(self, count, error_code='InsufficientCapacity'):
+        """
+        Queue several failure responses at once, all sharing the same
+        error message and expected parameters.
+        
+        Args:
+            count (int): Number of failure responses to queue
+            error_code (str): The AWS error code to simulate
+        """
+        error_kwargs = {
+            'service_error_code': error_code,
+            'service_message': _simulated_error_message(error_code),
+            'expected_params': self._EXPECTED_PARAMS
+        }
+        for _ in range(count):
+            self.stubber.add_client_error('create_capacity_reservation', **error_kwargs)
+
     def create_capacity_reservation_with_retry(self):
         """
         Attempt to create a capacity reservation with configurable retries.
         This method simulates making API calls to AWS with retry logic.
         """
+        # Read the loop's settings once - they don't change between attempts
+        max_retries = self.max_retries
+        max_wait_time = self.max_wait_time
+        get_backoff_delay = self.get_backoff_delay
+        create = self.ec2_client.create_capacity_reservation
         attempt = 0
+        delay = None
+        start_time = time.monotonic()
         
-        while attempt < self.max_retries:
+        while attempt < max_retries:
             try:
-                print(f"\nAttempt {attempt + 1} of {self.max_retries}")
+                logger.info("\nAttempt %d of %d", attempt + 1, max_retries)
                 # Attempt to create a capacity reservation
                 # Since we're using stubs, this will trigger our simulated error
-                response = self.ec2_client.create_capacity_reservation(
+                response = create(
                     InstanceType='t2.micro',
                     InstancePlatform='Linux/UNIX',
                     AvailabilityZone='us-west-2a',
@@ -104,41 +172,47 @@ class CapacityReservationSimulator:
                 # Extract error details from the AWS-style error response
                 error_code = e.response['Error']['Code']
                 error_message = e.response['Error']['Message']
-                print(f"Error occurred: {error_code} - {error_message}")
+                logger.warning("Error occurred: %s - %s", error_code, error_message)
                 
                 # If we haven't reached max retries, wait before trying again
-                if attempt < self.max_retries - 1:
-                    print(f"Waiting {self.retry_delay} seconds before retrying...")
-                    time.sleep(self.retry_delay)
+                if attempt < max_retries - 1:
+                    delay = get_backoff_delay(attempt, delay)
+                    # Stop early rather than sleep past the total wait budget
+                    if delay >= max_wait_time - (time.monotonic() - start_time):
+                        logger.error("Maximum wait time of %d seconds exceeded", max_wait_time)
+                        break
+                    logger.info("Waiting %.1f seconds before retrying...", delay)
+                    time.sleep(delay)
                 
                 attempt += 1
         
-        print("\nMax retries exceeded. Capacity reservation failed.")
+        logger.error("\nMax retries exceeded. Capacity reservation failed.")
         return None
 
-def run_simulation(max_retries=3, retry_delay=1, num_failures=3):
+def run_simulation(max_retries=3, retry_delay=1, num_failures=3, max_delay=30, jitter_mode='full'):
     """
     Run the capacity reservation simulation with configurable parameters.
     
     Args:
         max_retries (int): Maximum number of retry attempts
-        retry_delay (int): Delay between retries in seconds
+        retry_delay (int): Backoff before the first retry in seconds
         num_failures (int): Number of failed responses to simulate
+        max_delay (int): Upper bound for a single backoff in seconds
+        jitter_mode (str): How backoffs are randomized - 'none', 'full' or 'decorrelated'
     """
     # Create a simulator instance with specified retry configuration
-    simulator = CapacityReservationSimulator(max_retries, retry_delay)
+    simulator = CapacityReservationSimulator(max_retries, retry_delay, max_delay,
+                                             jitter_mode=jitter_mode)
     
-    # Setup the expected number of failed responses
-    # Each call to setup_failed_response adds one error response to the queue
-    for _ in range(num_failures):
-        simulator.setup_failed_response()
+    # Setup the expected number of failed responses in the stubber's queue
+    simulator.setup_failed_responses(num_failures)
     
     # The stubber context manager ensures AWS calls are intercepted
     with simulator.stubber:
-        print(f"\nStarting simulation with:")
-        print(f"Max retries: {max_retries}")
-        print(f"Retry delay: {retry_delay} seconds")
-        print(f"Number of simulated failures: {num_failures}")
+        logger.info("\nStarting simulation with:")
+        logger.info("Max retries: %s", max_retries)
+        logger.info("Backoff: %s seconds up to %s seconds, %s jitter", retry_delay, max_delay, jitter_mode)
+        logger.info("Number of simulated failures: %s", num_failures)
         
         simulator.create_capacity_reservation_with_retry()
 
@@ -146,31 +220,37 @@ if __name__ == "__main__":
     # Example usage showing different retry configurations using centralized config
     
     # Test Case 1: Quick retries configuration
-    print("\nTest Case 1: Quick Retries")
+    logger.info("\nTest Case 1: Quick Retries")
     quick_config = RETRY_CONFIG['QUICK_RETRY']
-    print(f"Using configuration: {quick_config['description']}")
+    logger.info("Using configuration: %s", quick_config['description'])
     run_simulation(
         max_retries=quick_config['max_retries'],
         retry_delay=quick_config['retry_delay_seconds'],
+        max_delay=quick_config['max_delay_seconds'],
+        jitter_mode=quick_config['jitter_mode'],
         num_failures=quick_config['num_failures']
     )
     
     # Test Case 2: Slow retries configuration
-    print("\nTest Case 2: Slow Retries")
+    logger.info("\nTest Case 2: Slow Retries")
     slow_config = RETRY_CONFIG['SLOW_RETRY']
-    print(f"Using configuration: {slow_config['description']}")
+    logger.info("Using configuration: %s", slow_config['description'])
     run_simulation(
         max_retries=slow_config['max_retries'],
         retry_delay=slow_config['retry_delay_seconds'],
+        max_delay=slow_config['max_delay_seconds'],
+        jitter_mode=slow_config['jitter_mode'],
         num_failures=slow_config['num_failures']
     )
     
     # Test Case 3: Extensive retries configuration
-    print("\nTest Case 3: Extensive Retries")
+    logger.info("\nTest Case 3: Extensive Retries")
     extensive_config = RETRY_CONFIG['EXTENSIVE_RETRY']
-    print(f"Using configuration: {extensive_config['description']}")
+    logger.info("Using configuration: %s", extensive_config['description'])
     run_simulation(
         max_retries=extensive_config['max_retries'],
         retry_delay=extensive_config['retry_delay_seconds'],
+        max_delay=extensive_config['max_delay_seconds'],
+        jitter_mode=extensive_config['jitter_mode'],
         num_failures=extensive_config['num_failures']
     )